@@ -3,6 +3,7 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from typing import Optional
 from pydantic import BaseModel, validator
+import asyncio
 import sqlite3
 import os
 import uuid
@@ -10,7 +11,8 @@ from PIL import Image
 import re
 import html
 
-from database import get_db_connection, get_upload_dir, get_thumbnail_dir
+from database import AsyncDatabase, find_artwork_schema, next_artwork_id
+from genres import get_async_db, get_genre, get_upload_dir, get_thumbnail_dir
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -60,6 +62,14 @@ def save_image_with_thumbnail(content: bytes, filename: str, genre: str) -> tupl
     
     return unique_filename, f"thumb_{unique_filename}", file_size
 
+def remove_image_files(image_filename: str, genre: str):
+    upload_dir = get_upload_dir(genre)
+    thumbnail_dir = get_thumbnail_dir(genre)
+    original_path = os.path.join(upload_dir, image_filename)
+    thumbnail_path = os.path.join(thumbnail_dir, f"thumb_{image_filename}")
+    if os.path.exists(original_path): os.remove(original_path)
+    if os.path.exists(thumbnail_path): os.remove(thumbnail_path)
+
 class ArtworkUpdate(BaseModel):
     author: str
     title: str
@@ -82,15 +92,9 @@ class ArtworkUpdate(BaseModel):
         if len(cleaned) > 1000: raise ValueError('備考が長すぎます（1000文字以内）')
         return cleaned.strip()
 
-@router.get("/artworks")
-def get_artworks(
-    request: Request,
-    genre: str,
-    conn: sqlite3.Connection = Depends(get_db_connection)
-):
+def _select_artworks(conn: sqlite3.Connection, search_query: Optional[str]):
     try:
         cursor = conn.cursor()
-        search_query = request.query_params.get('q', None)
         
         base_query = "SELECT id, author, title, style, image_filename, image_size, image_type, notes FROM artworks"
         params = []
@@ -114,6 +118,30 @@ def get_artworks(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"データの取得に失敗しました: {e}")
 
+@router.get("/artworks")
+async def get_artworks(
+    request: Request,
+    genre: str,
+    db: AsyncDatabase = Depends(get_async_db)
+):
+    search_query = request.query_params.get('q', None)
+    return await db.read(_select_artworks, search_query)
+
+def _insert_artwork(conn: sqlite3.Connection, values: tuple):
+    cursor = conn.cursor()
+    # 採番から登録までを他プロセスの書き込みと排他にし、全シャードで一意なIDを振る
+    cursor.execute("BEGIN IMMEDIATE")
+    artwork_id = next_artwork_id(conn)
+    cursor.execute("""
+        INSERT INTO artworks (id, author, title, style, notes, image_filename, image_size, image_type) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (artwork_id, *values))
+    
+    conn.commit()
+    
+    cursor.execute("SELECT * FROM artworks WHERE id = ?", (artwork_id,))
+    return dict(cursor.fetchone())
+
 @router.post("/artworks/upload")
 async def add_artwork_with_image(
     genre: str,
@@ -122,7 +150,7 @@ async def add_artwork_with_image(
     style: str = Form(...),
     notes: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
-    conn: sqlite3.Connection = Depends(get_db_connection)
+    db: AsyncDatabase = Depends(get_async_db)
 ):
     # サニタイズ
     author = author.strip()
@@ -131,9 +159,9 @@ async def add_artwork_with_image(
     if notes:
         notes = notes.strip()
 
+    loop = asyncio.get_running_loop()
     image_filename = None
     try:
-        cursor = conn.cursor()
         image_size = None
         image_type = None
         
@@ -142,49 +170,38 @@ async def add_artwork_with_image(
                 raise HTTPException(status_code=400, detail="無効な画像ファイルです")
             
             content = await image.read()
-            image_filename, _, image_size = save_image_with_thumbnail(content, image.filename, genre)
+            # 画像の保存とサムネイル生成はブロッキングなのでスレッドプールで行う
+            image_filename, _, image_size = await loop.run_in_executor(
+                None, save_image_with_thumbnail, content, image.filename, genre
+            )
             image_type = image.content_type
         
-        cursor.execute("""
-            INSERT INTO artworks (author, title, style, notes, image_filename, image_size, image_type) 
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (author, title, style, notes, image_filename, image_size, image_type))
-        
-        artwork_id = cursor.lastrowid
-        conn.commit()
-        
-        cursor.execute("SELECT * FROM artworks WHERE id = ?", (artwork_id,))
-        artwork_data = dict(cursor.fetchone())
+        artwork_data = await db.write(
+            _insert_artwork, (author, title, style, notes, image_filename, image_size, image_type)
+        )
+        get_genre(genre).invalidate_artwork_pool()
         
         return {"message": "作品を登録しました", "artwork": artwork_data}
         
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
         if image_filename:
             try:
-                upload_dir = get_upload_dir(genre)
-                thumbnail_dir = get_thumbnail_dir(genre)
-                original_path = os.path.join(upload_dir, image_filename)
-                thumbnail_path = os.path.join(thumbnail_dir, f"thumb_{image_filename}")
-                if os.path.exists(original_path): os.remove(original_path)
-                if os.path.exists(thumbnail_path): os.remove(thumbnail_path)
+                await loop.run_in_executor(None, remove_image_files, image_filename, genre)
             except:
                 pass
         raise HTTPException(status_code=500, detail=f"作品の登録に失敗しました: {e}")
 
-@router.put("/artworks/{artwork_id}")
-def update_artwork(
-    genre: str,
-    artwork_id: int,
-    artwork: ArtworkUpdate,
-    conn: sqlite3.Connection = Depends(get_db_connection)
-):
+def _update_artwork(conn: sqlite3.Connection, artwork_id: int, artwork: ArtworkUpdate):
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE artworks 
+        schema = find_artwork_schema(conn, artwork_id)
+        if schema is None:
+            raise HTTPException(status_code=404, detail="作品が見つかりません")
+        
+        cursor.execute(f"""
+            UPDATE {schema}.artworks 
             SET author = ?, title = ?, style = ?, notes = ?
             WHERE id = ?
         """, (artwork.author, artwork.title, artwork.style, artwork.notes, artwork_id))
@@ -194,7 +211,7 @@ def update_artwork(
         
         conn.commit()
         
-        cursor.execute("SELECT * FROM artworks WHERE id = ?", (artwork_id,))
+        cursor.execute(f"SELECT * FROM {schema}.artworks WHERE id = ?", (artwork_id,))
         updated_artwork = dict(cursor.fetchone())
         
         return {"message": "作品を更新しました", "artwork": updated_artwork}
@@ -205,15 +222,26 @@ def update_artwork(
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"更新に失敗しました: {e}")
 
-@router.delete("/artworks/{artwork_id}")
-def delete_artwork(
+@router.put("/artworks/{artwork_id}")
+async def update_artwork(
     genre: str,
     artwork_id: int,
-    conn: sqlite3.Connection = Depends(get_db_connection)
+    artwork: ArtworkUpdate,
+    db: AsyncDatabase = Depends(get_async_db)
 ):
+    result = await db.write(_update_artwork, artwork_id, artwork)
+    get_genre(genre).invalidate_artwork_pool()
+    return result
+
+def _delete_artwork(conn: sqlite3.Connection, artwork_id: int) -> Optional[str]:
+    """作品を削除し、削除した作品の画像ファイル名を返す"""
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT image_filename FROM artworks WHERE id = ?", (artwork_id,))
+        schema = find_artwork_schema(conn, artwork_id)
+        if schema is None:
+            raise HTTPException(status_code=404, detail="作品が見つかりません")
+        
+        cursor.execute(f"SELECT image_filename FROM {schema}.artworks WHERE id = ?", (artwork_id,))
         row = cursor.fetchone()
         
         if not row:
@@ -221,29 +249,36 @@ def delete_artwork(
         
         image_filename = row["image_filename"]
         
-        cursor.execute("DELETE FROM artworks WHERE id = ?", (artwork_id,))
+        cursor.execute(f"DELETE FROM {schema}.artworks WHERE id = ?", (artwork_id,))
         
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="作品が見つかりません")
         
         conn.commit()
         
-        if image_filename:
-            try:
-                upload_dir = get_upload_dir(genre)
-                thumbnail_dir = get_thumbnail_dir(genre)
-                original_path = os.path.join(upload_dir, image_filename)
-                thumbnail_path = os.path.join(thumbnail_dir, f"thumb_{image_filename}")
-                
-                if os.path.exists(original_path): os.remove(original_path)
-                if os.path.exists(thumbnail_path): os.remove(thumbnail_path)
-            except Exception as file_error:
-                print(f"Warning: 画像ファイルの削除に失敗しました: {file_error}")
-        
-        return {"message": "作品を削除しました"}
+        return image_filename
         
     except HTTPException:
         raise
     except Exception as e:
         conn.rollback()
-        raise HTTPException(status_code=500, detail=f"削除に失敗しました: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"削除に失敗しました: {e}")
+
+@router.delete("/artworks/{artwork_id}")
+async def delete_artwork(
+    genre: str,
+    artwork_id: int,
+    db: AsyncDatabase = Depends(get_async_db)
+):
+    image_filename = await db.write(_delete_artwork, artwork_id)
+    get_genre(genre).invalidate_artwork_pool()
+    
+    # ファイル削除で書き込みレーンを塞がないよう、削除はコミット後にスレッドプールで行う
+    if image_filename:
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, remove_image_files, image_filename, genre)
+        except Exception as file_error:
+            print(f"Warning: 画像ファイルの削除に失敗しました: {file_error}")
+    
+    return {"message": "作品を削除しました"}
\ No newline at end of file
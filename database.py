@@ -1,35 +1,175 @@
+import asyncio
+import functools
 import sqlite3
-from fastapi import HTTPException
-
-UPLOAD_DIRS = {
-    "western": "uploads/images",
-    "japanese": "uploads/japanese_images"
-}
-THUMBNAIL_DIRS = {
-    "western": "uploads/thumbnails",
-    "japanese": "uploads/japanese_thumbnails"
-}
-
-def get_db_path(genre: str) -> str:
-    if genre == "western":
-        return "art.db"
-    elif genre == "japanese":
-        return "japanese_art.db"
-    else:
-        raise HTTPException(status_code=404, detail="Genre not found")
-
-def get_upload_dir(genre: str) -> str:
-    return UPLOAD_DIRS.get(genre)
-
-def get_thumbnail_dir(genre: str) -> str:
-    return THUMBNAIL_DIRS.get(genre)
-
-def get_db_connection(genre: str):
-    db_path = get_db_path(genre)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    # Row factory to get results as dictionaries
-    conn.row_factory = sqlite3.Row
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+# 読み取りレーンのワーカー数の既定値（書き込みレーンは常に1本）
+READ_WORKERS = 4
+
+def sqlite_uri(path: str, read_only: bool) -> str:
+    """SQLiteファイルの file: URI（mode=ro/rw なので存在しないファイルは作成しない）"""
+    mode = "ro" if read_only else "rw"
+    return f"{Path(path).resolve().as_uri()}?mode={mode}"
+
+def artwork_schemas(conn: sqlite3.Connection) -> List[str]:
+    """artworks を持つスキーマ名（main と ATTACH 済みシャード）"""
+    return [row["name"] for row in conn.execute("PRAGMA database_list") if row["name"] != "temp"]
+
+def find_artwork_schema(conn: sqlite3.Connection, artwork_id: int) -> Optional[str]:
+    """指定IDの作品を持つスキーマ名を返す（見つからなければNone）"""
+    for schema in artwork_schemas(conn):
+        if conn.execute(f"SELECT 1 FROM {schema}.artworks WHERE id = ?", (artwork_id,)).fetchone():
+            return schema
+    return None
+
+def next_artwork_id(conn: sqlite3.Connection) -> int:
+    """全シャードで重複しない次の作品IDを返す。
+
+    呼び出し側で BEGIN IMMEDIATE 済みであること（他プロセスとの採番の競合を防ぐ）。
+    削除済みIDを再利用しないよう、AUTOINCREMENT の sqlite_sequence も考慮する。
+    """
+    last_id = 0
+    for schema in artwork_schemas(conn):
+        last_id = max(last_id, conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {schema}.artworks").fetchone()[0])
+        has_sequence = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'sqlite_sequence'"
+        ).fetchone()
+        if has_sequence:
+            row = conn.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = 'artworks'").fetchone()
+            if row:
+                last_id = max(last_id, row[0])
+    return last_id + 1
+
+def artwork_columns(conn: sqlite3.Connection, schema: str = "main") -> List[str]:
+    """artworks テーブルの列名を定義順に返す（テーブルがなければ空）"""
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(artworks)")]
+
+def validate_shards(db_paths: List[str]):
+    """シャード構成を起動時に検証する。
+
+    シャードがあるときは、全ファイルが存在して artworks テーブルを持ち、列の名前と順序が
+    プライマリと一致し、作品IDが重複しないことを確認する。IDの重複は全ファイルを
+    ATTACHしてSQLで調べる（主キーの索引を使うので全IDを読み込まない）。
+    """
+    if len(db_paths) < 2:
+        return
+    for path in db_paths:
+        if not Path(path).is_file():
+            raise ValueError(f"シャードが見つかりません: {path}")
+
+    conn = sqlite3.connect(":memory:", uri=True)
     try:
-        yield conn
+        schemas = []
+        for i, path in enumerate(db_paths):
+            schema = f"db{i}"
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (sqlite_uri(path, read_only=True),))
+            schemas.append(schema)
+
+        primary_columns = artwork_columns(conn, schemas[0])
+        if not primary_columns:
+            raise ValueError(f"artworks テーブルがありません: {db_paths[0]}")
+        for schema, path in zip(schemas[1:], db_paths[1:]):
+            columns = artwork_columns(conn, schema)
+            if not columns:
+                raise ValueError(f"artworks テーブルがありません: {path}")
+            if columns != primary_columns:
+                raise ValueError(f"artworks の列構成がプライマリ {db_paths[0]} と異なります: {path} {columns}")
+
+        for a in range(len(schemas)):
+            for b in range(a + 1, len(schemas)):
+                row = conn.execute(
+                    f"SELECT x.id FROM {schemas[a]}.artworks x JOIN {schemas[b]}.artworks y ON x.id = y.id LIMIT 1"
+                ).fetchone()
+                if row:
+                    raise ValueError(f"作品ID {row[0]} が {db_paths[a]} と {db_paths[b]} で重複しています")
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+class AsyncDatabase:
+    """ジャンルごとのDBに対する非同期アクセス。
+
+    読み取り用の複数スレッドと書き込み用の単一スレッドを別々のレーンとして持ち、
+    各スレッドは自分専用のコネクションを使い回す。WALモードにより、
+    読み取りは書き込み中でも並行して進められる。
+
+    shard_paths を指定すると各コネクションにシャードをATTACHする。読み取りレーンでは
+    読み取り専用でATTACHし、全シャードの artworks を束ねた一時ビューを artworks として
+    参照できる。書き込みレーンでは読み書き可能でATTACHし、既存作品の更新・削除は
+    find_artwork_schema で所有シャードに振り分ける。新規作品はプライマリに登録する。
+    """
+
+    def __init__(self, db_path: str, read_workers: int = READ_WORKERS, shard_paths: tuple = ()):
+        self.db_path = db_path
+        self.shard_paths = tuple(shard_paths)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._reader = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix=f"db-read-{db_path}")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"db-write-{db_path}")
+
+    def _get_connection(self, read_only: bool) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # uri=True はシャードを file: URI（mode=ro）でATTACHするため。通常のパスはそのまま扱われる
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=True)
+            try:
+                # Row factory to get results as dictionaries
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA busy_timeout=5000")
+                if self.shard_paths:
+                    self._attach_shards(conn, read_only)
+                if read_only:
+                    # 読み取りレーンからの書き込みを禁止し、書き込みを単一の書き込みレーンに限定する
+                    conn.execute("PRAGMA query_only=ON")
+            except Exception:
+                # 準備に失敗したコネクションは保持されないので、ここで閉じる
+                conn.close()
+                raise
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _attach_shards(self, conn: sqlite3.Connection, read_only: bool):
+        # UNION ALL は列を位置で対応させるため、プライマリの列名を明示して並びを揃える
+        columns = ", ".join(f'"{name}"' for name in artwork_columns(conn))
+        selects = [f"SELECT {columns} FROM main.artworks"]
+        for i, path in enumerate(self.shard_paths, start=1):
+            conn.execute(f"ATTACH DATABASE ? AS shard{i}", (sqlite_uri(path, read_only),))
+            selects.append(f"SELECT {columns} FROM shard{i}.artworks")
+        if read_only:
+            # 一時ビューは main より先に解決されるため、既存のクエリはそのまま全シャードを読む
+            conn.execute("CREATE TEMP VIEW artworks AS " + " UNION ALL ".join(selects))
+
+    def _call(self, read_only: bool, func, *args):
+        conn = self._get_connection(read_only)
+        try:
+            return func(conn, *args)
+        finally:
+            # 使い回すコネクションにトランザクションを残さない
+            if conn.in_transaction:
+                conn.rollback()
+
+    async def _submit(self, executor: ThreadPoolExecutor, read_only: bool, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(self._call, read_only, func, *args))
+
+    async def read(self, func, *args):
+        """func(conn, *args) を読み取りレーンで実行する"""
+        return await self._submit(self._reader, True, func, *args)
+
+    async def write(self, func, *args):
+        """func(conn, *args) を書き込みレーンで実行する（同時に1件のみ）"""
+        return await self._submit(self._writer, False, func, *args)
+
+    def close(self):
+        self._reader.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+from fastapi import HTTPException
+
+from database import AsyncDatabase, READ_WORKERS, validate_shards
+from quiz_builder import ArtworkPool, load_artwork_pool
+
+# ジャンル定義ファイル（環境変数で差し替え可能）
+GENRES_CONFIG = os.environ.get("GENRES_CONFIG", "genres.json")
+ARTWORK_POOL_TTL = 300
+
+class Genre:
+    """1ジャンル分の設定と、起動時に用意する共有リソース。
+
+    DB（複数ファイルの場合は先頭がプライマリ、残りはシャード）、
+    画像保存先、フォールバック選択肢、作品プールのキャッシュを持つ。
+    設定はインポート時に読み込み、DBレーンなどのリソースは open() / close() で
+    アプリの lifespan ごとに作り直す。
+    """
+
+    def __init__(self, name: str, config: dict):
+        self.name = name
+        self.label = config.get("label", name)
+        self.description = config.get("description", "")
+        self.cover_image = config.get("cover_image")
+        # ジャンル専用のスタイルシートがなければ共通の style.css を使う
+        self.css_file = config.get("css_file", "style.css")
+        self.upload_dir = config["upload_dir"]
+        self.thumbnail_dir = config["thumbnail_dir"]
+        # 画像とサムネイルの配信URL（main.py でジャンルごとにマウントする）
+        self.upload_url = f"/media/{name}/images"
+        self.thumbnail_url = f"/media/{name}/thumbnails"
+        self.fallback_options: Dict[str, List[str]] = config.get("fallback_options", {})
+
+        db_paths = config["db"]
+        if isinstance(db_paths, str):
+            db_paths = [db_paths]
+        self.db_paths = list(db_paths)
+
+        cache = config.get("cache", {})
+        self.artwork_pool_ttl = cache.get("artwork_pool_ttl", ARTWORK_POOL_TTL)
+        self.read_workers = cache.get("read_workers", READ_WORKERS)
+        self.db = None
+
+        # (世代, 読み込み時刻, プール) を1つのタプルとして差し替える。
+        # 無効化は世代を進めるだけなので、イベントループ上からロックなしで呼べる
+        self._artwork_pool_generation = 0
+        self._artwork_pool_entry = None
+        # 再構築を1スレッドに限定するためのロック（読み取りレーンのスレッドだけが取る）
+        self._artwork_pool_rebuild_lock = threading.Lock()
+
+    def _cached_artwork_pool(self):
+        entry = self._artwork_pool_entry
+        if entry is None:
+            return None
+        entry_generation, loaded_at, pool = entry
+        if entry_generation != self._artwork_pool_generation:
+            return None
+        if time.monotonic() - loaded_at > self.artwork_pool_ttl:
+            return None
+        return pool
+
+    def get_artwork_pool(self, conn: sqlite3.Connection) -> ArtworkPool:
+        """作品プールを返す。期限切れ・無効化済みなら conn から読み直す"""
+        pool = self._cached_artwork_pool()
+        if pool is not None:
+            return pool
+
+        with self._artwork_pool_rebuild_lock:
+            # 待っている間に他のスレッドが作り直していれば、それを使う
+            pool = self._cached_artwork_pool()
+            if pool is not None:
+                return pool
+            generation = self._artwork_pool_generation
+            pool = load_artwork_pool(conn)
+            # 読み込み中に無効化されていた場合、古い世代のエントリは次回の参照で捨てられる
+            self._artwork_pool_entry = (generation, time.monotonic(), pool)
+            return pool
+
+    def invalidate_artwork_pool(self):
+        """作品の登録・更新・削除後に呼び、次回のクイズ生成で読み直させる"""
+        self._artwork_pool_generation += 1
+
+    async def warm_artwork_pool(self):
+        """起動時に作品プールを作っておく"""
+        try:
+            await self.db.read(self.get_artwork_pool)
+        except Exception as e:
+            print(f"Warning: {self.name} の作品プールを作成できませんでした: {e}")
+
+    def open(self):
+        """シャードを検証し、保存先ディレクトリとDBレーンを用意する"""
+        validate_shards(self.db_paths)
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        self.db = AsyncDatabase(self.db_paths[0], read_workers=self.read_workers, shard_paths=self.db_paths[1:])
+        self.invalidate_artwork_pool()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+def load_genres(path: str = GENRES_CONFIG) -> Dict[str, Genre]:
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return {name: Genre(name, genre_config) for name, genre_config in config.items()}
+
+# 設定は起動時に一度だけ読み込む（リソースは open_genres で用意する）
+GENRES: Dict[str, Genre] = load_genres()
+
+def get_genre(genre: str) -> Genre:
+    genre_entry = GENRES.get(genre)
+    if genre_entry is None:
+        raise HTTPException(status_code=404, detail="Genre not found")
+    return genre_entry
+
+def get_upload_dir(genre: str) -> str:
+    return get_genre(genre).upload_dir
+
+def get_thumbnail_dir(genre: str) -> str:
+    return get_genre(genre).thumbnail_dir
+
+async def get_async_db(genre: str) -> AsyncDatabase:
+    # async依存関数にしてイベントループ上で解決する（スレッドプールを使わない）
+    return get_genre(genre).db
+
+def open_genres():
+    for genre_entry in GENRES.values():
+        genre_entry.open()
+
+async def warm_genres():
+    await asyncio.gather(*(genre_entry.warm_artwork_pool() for genre_entry in GENRES.values()))
+
+def close_genres():
+    for genre_entry in GENRES.values():
+        genre_entry.close()
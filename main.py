@@ -1,4 +1,5 @@
 import secrets
+from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
 
 from fastapi import FastAPI, HTTPException, Request
@@ -9,8 +10,20 @@ from fastapi.staticfiles import StaticFiles
 # ルーターをインポート
 from artworks import router as artworks_router
 from quiz import quiz_router, stats_router
+from genres import GENRES, close_genres, open_genres, warm_genres
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ジャンルごとのDBレーンと作品プールは lifespan ごとに作り直す
+    open_genres()
+    try:
+        await warm_genres()
+        yield
+    finally:
+        # DBの読み取り/書き込みレーンを停止し、コネクションを閉じる
+        close_genres()
+
+app = FastAPI(lifespan=lifespan)
 
 # セッションミドルウェアの設定
 # 本番環境では、このSECRET_KEYを環境変数などから取得するようにしてください
@@ -20,6 +33,10 @@ app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 # 静的ファイル配信の設定
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# ジャンルごとの画像ディレクトリは lifespan の起動時に作成されるため、ここでは存在を確認しない
+for genre_entry in GENRES.values():
+    app.mount(genre_entry.upload_url, StaticFiles(directory=genre_entry.upload_dir, check_dir=False), name=f"{genre_entry.name}_images")
+    app.mount(genre_entry.thumbnail_url, StaticFiles(directory=genre_entry.thumbnail_dir, check_dir=False), name=f"{genre_entry.name}_thumbnails")
 
 # ルーターを登録
 app.include_router(stats_router)
@@ -30,27 +47,23 @@ templates = Jinja2Templates(directory="templates")
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    """トップページ。西洋美術か日本美術かを選択する画面。"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    """トップページ。挑戦するジャンルを選択する画面。"""
+    return templates.TemplateResponse("index.html", {"request": request, "genres": GENRES.values()})
 
 @app.get("/quiz/{genre}", response_class=HTMLResponse)
 async def read_quiz(request: Request, genre: str):
     """ジャンル別のクイズページ"""
-    if genre not in ["western", "japanese"]:
+    genre_entry = GENRES.get(genre)
+    if genre_entry is None:
         return RedirectResponse(url="/")
     
-    # ジャンルに応じたCSSファイルを決定
-    css_file = f"{genre}.css"
-    
-    return templates.TemplateResponse("quiz.html", {"request": request, "genre": genre, "css_file": css_file})
+    return templates.TemplateResponse("quiz.html", {"request": request, "genre": genre, "genre_entry": genre_entry})
 
 @app.get("/artworks/{genre}", response_class=HTMLResponse)
 async def read_artworks(request: Request, genre: str):
     """ジャンル別の作品管理ページ"""
-    if genre not in ["western", "japanese"]:
+    genre_entry = GENRES.get(genre)
+    if genre_entry is None:
         return RedirectResponse(url="/")
     
-    # ジャンルに応じたCSSファイルを決定
-    css_file = f"{genre}.css"
-    
-    return templates.TemplateResponse("artworks.html", {"request": request, "genre": genre, "css_file": css_file})
+    return templates.TemplateResponse("artworks.html", {"request": request, "genre": genre, "genre_entry": genre_entry})
@@ -6,7 +6,8 @@ import sqlite3
 from pydantic import BaseModel
 from typing import List
 
-from database import get_db_connection
+from database import AsyncDatabase
+from genres import get_async_db, get_genre
 from quiz_builder import build_quiz_data
 
 quiz_router = APIRouter()
@@ -21,11 +22,7 @@ class QuizResult(BaseModel):
     is_correct: bool
 
 
-@quiz_router.post("/quiz/submit")
-def submit_quiz_result(
-    result: QuizResult,
-    conn: sqlite3.Connection = Depends(get_db_connection)
-):
+def _insert_quiz_result(conn: sqlite3.Connection, result: QuizResult):
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -38,8 +35,14 @@ def submit_quiz_result(
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"結果の記録に失敗しました: {e}")
 
-@stats_router.get("/quiz/stats/{genre}")
-def get_quiz_stats(genre: str, conn: sqlite3.Connection = Depends(get_db_connection)):
+@quiz_router.post("/quiz/submit")
+async def submit_quiz_result(
+    result: QuizResult,
+    db: AsyncDatabase = Depends(get_async_db)
+):
+    return await db.write(_insert_quiz_result, result)
+
+def _select_quiz_stats(conn: sqlite3.Connection):
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM quiz_results")
@@ -82,14 +85,23 @@ def get_quiz_stats(genre: str, conn: sqlite3.Connection = Depends(get_db_connect
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"統計情報の取得に失敗しました: {e}")
 
+@stats_router.get("/quiz/stats/{genre}")
+async def get_quiz_stats(genre: str, db: AsyncDatabase = Depends(get_async_db)):
+    return await db.read(_select_quiz_stats)
+
 
 @stats_router.get("/quiz/stats_view/{genre}", response_class=HTMLResponse)
 async def get_quiz_stats_view(request: Request, genre: str):
-    return templates.TemplateResponse("quiz_stats.html", {"request": request, "genre": genre})
+    genre_entry = get_genre(genre)
+    return templates.TemplateResponse("quiz_stats.html", {"request": request, "genre": genre, "genre_label": genre_entry.label})
 
 
-@quiz_router.get("/quiz/multiple-choice")
-def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connection = Depends(get_db_connection)):
+def _build_quiz(conn: sqlite3.Connection, genre: str, correct_row: dict, question_field: str):
+    genre_entry = get_genre(genre)
+    pool = genre_entry.get_artwork_pool(conn)
+    return build_quiz_data(correct_row, conn, pool, genre_entry.fallback_options, question_field)
+
+def _build_multiple_choice_quiz(conn: sqlite3.Connection, genre: str, quiz_history: List[int]):
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM artworks")
     total_artwork_count = cursor.fetchone()['COUNT(*)']
@@ -97,7 +109,6 @@ def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connect
         raise HTTPException(status_code=404, detail="4択クイズには最低4件のデータが必要です")
 
     HISTORY_LENGTH = 5
-    quiz_history = request.session.get("quiz_history", [])
     artwork_ids_to_exclude = tuple(quiz_history)
     
     exclude_sql = ""
@@ -111,7 +122,6 @@ def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connect
 
     if remaining_artwork_count == 0 and artwork_ids_to_exclude:
         quiz_history = []
-        request.session["quiz_history"] = []
         exclude_sql = ""
 
     query = f"SELECT * FROM artworks WHERE 1=1{exclude_sql} ORDER BY RANDOM() LIMIT 1"
@@ -120,7 +130,7 @@ def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connect
 
     if not correct_row_tuple:
         # 履歴をクリアして再試行
-        request.session["quiz_history"] = []
+        quiz_history = []
         query = f"SELECT * FROM artworks ORDER BY RANDOM() LIMIT 1"
         cursor.execute(query)
         correct_row_tuple = cursor.fetchone()
@@ -129,10 +139,9 @@ def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connect
 
     correct_row = dict(correct_row_tuple)
     
-    quiz_history.append(correct_row['id'])
+    quiz_history = quiz_history + [correct_row['id']]
     if len(quiz_history) > HISTORY_LENGTH:
         quiz_history.pop(0)
-    request.session["quiz_history"] = quiz_history
 
     cursor.execute("SELECT COUNT(*) FROM artworks WHERE image_filename IS NOT NULL AND image_filename != ''")
     image_artwork_count = cursor.fetchone()['COUNT(*)']
@@ -142,10 +151,17 @@ def get_multiple_choice_quiz(genre: str, request: Request, conn: sqlite3.Connect
         possible_fields.append("image")
     question_field = random.choice(possible_fields)
 
-    return build_quiz_data(correct_row, conn, genre, question_field)
+    return _build_quiz(conn, genre, correct_row, question_field), quiz_history
 
-@quiz_router.post("/quiz/reset")
-def reset_quiz_results(genre: str, conn: sqlite3.Connection = Depends(get_db_connection)):
+@quiz_router.get("/quiz/multiple-choice")
+async def get_multiple_choice_quiz(genre: str, request: Request, db: AsyncDatabase = Depends(get_async_db)):
+    # セッションはワーカースレッドに渡さず、履歴だけを受け渡す
+    quiz_history = list(request.session.get("quiz_history", []))
+    quiz_data, quiz_history = await db.read(_build_multiple_choice_quiz, genre, quiz_history)
+    request.session["quiz_history"] = quiz_history
+    return quiz_data
+
+def _delete_quiz_results(conn: sqlite3.Connection):
     try:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM quiz_results")
@@ -155,8 +171,11 @@ def reset_quiz_results(genre: str, conn: sqlite3.Connection = Depends(get_db_con
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"リセットに失敗しました")
 
-@quiz_router.get("/quiz/recent-results")
-def get_recent_results(genre: str, conn: sqlite3.Connection = Depends(get_db_connection)):
+@quiz_router.post("/quiz/reset")
+async def reset_quiz_results(genre: str, db: AsyncDatabase = Depends(get_async_db)):
+    return await db.write(_delete_quiz_results)
+
+def _select_recent_results(conn: sqlite3.Connection):
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -170,9 +189,12 @@ def get_recent_results(genre: str, conn: sqlite3.Connection = Depends(get_db_con
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"最近の結果の取得に失敗しました: {e}")
 
+@quiz_router.get("/quiz/recent-results")
+async def get_recent_results(genre: str, db: AsyncDatabase = Depends(get_async_db)):
+    return await db.read(_select_recent_results)
 
-@quiz_router.get("/quiz/review")
-def get_review_quiz(genre: str, request: Request, conn: sqlite3.Connection = Depends(get_db_connection)):
+
+def _build_review_quiz(conn: sqlite3.Connection, genre: str):
     cursor = conn.cursor()
     
     cursor.execute("SELECT DISTINCT artwork_id FROM quiz_results WHERE is_correct = 0")
@@ -196,4 +218,8 @@ def get_review_quiz(genre: str, request: Request, conn: sqlite3.Connection = Dep
         possible_fields.append("image")
     question_field = random.choice(possible_fields)
 
-    return build_quiz_data(correct_row, conn, genre, question_field)
\ No newline at end of file
+    return _build_quiz(conn, genre, correct_row, question_field)
+
+@quiz_router.get("/quiz/review")
+async def get_review_quiz(genre: str, request: Request, db: AsyncDatabase = Depends(get_async_db)):
+    return await db.read(_build_review_quiz, genre)
\ No newline at end of file
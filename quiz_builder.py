@@ -6,16 +6,43 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from fastapi import HTTPException
 
-def get_similar_choices(all_artworks: List[dict], correct_artwork: dict, field: str, num_choices=3) -> List[str]:
-    """指定されたフィールドについて、似ている選択肢を返す"""
+QUIZ_FIELDS = ("author", "title", "style")
+
+def build_tfidf_matrix(all_artworks: List[dict]):
+    """作者・作品名・様式を連結したTF-IDF行列を作る（語彙が空ならNone）"""
     corpus = [f"{artwork.get('author', '')} {artwork.get('title', '')} {artwork.get('style', '')}" for artwork in all_artworks]
     try:
         vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(corpus)
+        return vectorizer.fit_transform(corpus)
     except ValueError:
+        return None
+
+class ArtworkPool:
+    """クイズ生成用に前計算した作品一覧・索引・TF-IDF行列"""
+
+    def __init__(self, all_artworks: List[dict]):
+        self.artworks = all_artworks
+        self.index_by_id = {art['id']: i for i, art in enumerate(all_artworks)}
+        self.image_artworks = [art for art in all_artworks if art.get('image_filename')]
+        self.distinct_values = {
+            field: list(dict.fromkeys(art[field] for art in all_artworks if art.get(field)))
+            for field in QUIZ_FIELDS
+        }
+        self.tfidf_matrix = build_tfidf_matrix(all_artworks)
+
+def load_artwork_pool(conn: sqlite3.Connection) -> ArtworkPool:
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM artworks")
+    return ArtworkPool([dict(row) for row in cursor.fetchall()])
+
+def get_similar_choices(pool: ArtworkPool, correct_artwork: dict, field: str, num_choices=3) -> List[str]:
+    """指定されたフィールドについて、似ている選択肢を返す"""
+    all_artworks = pool.artworks
+    tfidf_matrix = pool.tfidf_matrix
+    if tfidf_matrix is None:
         return []
 
-    correct_index = next((i for i, art in enumerate(all_artworks) if art['id'] == correct_artwork['id']), -1)
+    correct_index = pool.index_by_id.get(correct_artwork['id'], -1)
     if correct_index == -1:
         return []
 
@@ -45,9 +72,15 @@ def get_similar_choices(all_artworks: List[dict], correct_artwork: dict, field:
             
     return choices
 
-def build_quiz_data(correct_row: Dict, conn: sqlite3.Connection, genre: str, question_field: str) -> Dict:
-    """1件の作品データからクイズ一式を生成する"""
+def image_choices_exist(conn: sqlite3.Connection, image_filenames: List[str]) -> bool:
+    """プールから選んだ画像がまだDBに登録されているかを確認する"""
+    placeholders = ", ".join("?" for _ in image_filenames)
     cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(DISTINCT image_filename) FROM artworks WHERE image_filename IN ({placeholders})", image_filenames)
+    return cursor.fetchone()[0] == len(set(image_filenames))
+
+def build_quiz_data(correct_row: Dict, conn: sqlite3.Connection, pool: ArtworkPool, fallback_options: Dict[str, List[str]], question_field: str) -> Dict:
+    """1件の作品データからクイズ一式を生成する"""
     quiz_artwork_data = correct_row.copy()
     choices = []
     correct_answer = ""
@@ -55,12 +88,19 @@ def build_quiz_data(correct_row: Dict, conn: sqlite3.Connection, genre: str, que
 
     if question_field == "image":
         correct_answer = correct_row["image_filename"]
-        cursor.execute("""
-            SELECT image_filename FROM artworks 
-            WHERE image_filename IS NOT NULL AND image_filename != '' AND id != ? 
-            ORDER BY RANDOM() LIMIT 3
-        """, (correct_row["id"],))
-        dummy_answers = [row['image_filename'] for row in cursor.fetchall()]
+        image_candidates = [art['image_filename'] for art in pool.image_artworks if art['id'] != correct_row["id"]]
+        dummy_answers = random.sample(image_candidates, 3) if len(image_candidates) >= 3 else []
+
+        # プールは別プロセスでの登録・削除を反映していない場合があるため、DBで確認する。
+        # 不足・不一致のときは従来どおりDBから直接選ぶ
+        if not dummy_answers or not image_choices_exist(conn, dummy_answers):
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT image_filename FROM artworks 
+                WHERE image_filename IS NOT NULL AND image_filename != '' AND id != ? 
+                ORDER BY RANDOM() LIMIT 3
+            """, (correct_row["id"],))
+            dummy_answers = [row['image_filename'] for row in cursor.fetchall()]
         
         if len(dummy_answers) < 3:
             raise HTTPException(status_code=500, detail="画像クイズの選択肢作成に失敗しました。画像付きの作品が4つ以上必要です。")
@@ -74,23 +114,15 @@ def build_quiz_data(correct_row: Dict, conn: sqlite3.Connection, genre: str, que
     else: # author, title, style
         correct_answer = correct_row[question_field]
         
-        cursor.execute("SELECT * FROM artworks")
-        all_artworks = [dict(row) for row in cursor.fetchall()]
-        
-        dummy_answers = get_similar_choices(all_artworks, correct_row, question_field)
+        dummy_answers = get_similar_choices(pool, correct_row, question_field)
 
         added_choices_stripped = {correct_answer.strip()}
         for ans in dummy_answers:
             added_choices_stripped.add(ans.strip())
 
         if len(dummy_answers) < 3:
-            cursor.execute(f"""
-                SELECT DISTINCT {question_field} FROM artworks 
-                WHERE {question_field} IS NOT NULL AND {question_field} != ''
-                ORDER BY RANDOM()
-            """, ())
-            
-            fallback_candidates = [row[question_field] for row in cursor.fetchall()]
+            fallback_candidates = list(pool.distinct_values[question_field])
+            random.shuffle(fallback_candidates)
             for candidate in fallback_candidates:
                 if len(dummy_answers) >= 3:
                     break
@@ -100,19 +132,7 @@ def build_quiz_data(correct_row: Dict, conn: sqlite3.Connection, genre: str, que
                     added_choices_stripped.add(candidate_stripped)
 
         if len(dummy_answers) < 3:
-            fallback_options = {
-                "western": {
-                    "author": ["レオナルド・ダ・ヴィンチ", "ミケランジェロ", "ラファエロ", "ピカソ", "モネ", "ゴッホ"],
-                    "title": ["モナリザ", "最後の晩餐", "星月夜", "ひまわり", "叫び", "真珠の耳飾りの少女"],
-                    "style": ["ルネサンス", "バロック", "印象派", "キュビスム", "シュルレアリスム", "抽象表現主義"]
-                },
-                "japanese": {
-                    "author": ["葛飾北斎", "歌川広重", "伊藤若冲", "雪舟", "千利休", "横山大観"],
-                    "title": ["冨嶽三十六景 神奈川沖浪裏", "東海道五十三次", "鳥獣人物戯画", "雪松図屏風", "風神雷神図屏風", "無我"],
-                    "style": ["浮世絵", "琳派", "狩野派", "水墨画", "大和絵", "日本画"]
-                }
-            }
-            all_fallbacks = [opt for opt in fallback_options[genre][question_field] if opt.strip() not in added_choices_stripped]
+            all_fallbacks = [opt for opt in fallback_options.get(question_field, []) if opt.strip() not in added_choices_stripped]
             while len(dummy_answers) < 3 and all_fallbacks:
                 chosen = random.choice(all_fallbacks)
                 dummy_answers.append(chosen)
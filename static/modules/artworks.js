@@ -1,7 +1,7 @@
 // 作品管理機能 (artworks.html)
 
 
-import { escapeHtml, openMessageModal } from './utils.js';
+import { escapeHtml, openMessageModal, imageUrl, thumbnailUrl } from './utils.js';
 
 // 作品登録 (画像アップロード対応)
 export async function handleUploadSubmit(e, genre) {
@@ -109,12 +109,10 @@ export function createArtworkRow(artwork, genre) {
     const imageCell = row.children[5];
     if (artwork.image_filename) {
         const img = document.createElement('img');
-        const thumbPath = genre === 'japanese' ? 'japanese_thumbnails' : 'thumbnails';
-        img.src = `/uploads/${thumbPath}/thumb_${artwork.image_filename}`;
+        img.src = thumbnailUrl(artwork.image_filename);
         img.alt = '作品画像';
         img.className = 'thumbnail-image';
-        const imagePath = genre === 'japanese' ? 'japanese_images' : 'images';
-        img.onclick = () => window.open(`/uploads/${imagePath}/${artwork.image_filename}`, '_blank');
+        img.onclick = () => window.open(imageUrl(artwork.image_filename), '_blank');
         imageCell.appendChild(img);
     } else {
         imageCell.textContent = 'なし';
@@ -2,7 +2,7 @@
 
 let currentQuizData = null;
 let quizAnswered = false;
-import { escapeHtml, openMessageModal } from './utils.js';
+import { escapeHtml, openMessageModal, imageUrl, thumbnailUrl } from './utils.js';
 
 export function applyTheme(genre) {
     const urlParams = new URLSearchParams(window.location.search);
@@ -58,8 +58,7 @@ export function displayMultipleChoiceQuiz(data, genre) {
         choicesContainer.className = 'quiz-choices image-choices';
         data.choices.forEach(choice => {
             const img = document.createElement('img');
-            const thumbPath = genre === 'japanese' ? 'japanese_thumbnails' : 'thumbnails';
-            img.src = `/uploads/${thumbPath}/thumb_${choice}`;
+            img.src = thumbnailUrl(choice);
             img.alt = '選択肢の画像';
             img.className = 'choice-image';
             img.dataset.filename = choice;
@@ -95,12 +94,10 @@ export function displayArtworkInfo(artwork, container, genre) {
     const filename = artwork.image_filename;
     if (filename && filename !== "???") {
         const img = document.createElement('img');
-        const thumbPath = genre === 'japanese' ? 'japanese_thumbnails' : 'thumbnails';
-        img.src = `/uploads/${thumbPath}/thumb_${filename}`;
+        img.src = thumbnailUrl(filename);
         img.alt = '作品画像';
         img.className = 'quiz-image';
-        const imagePath = genre === 'japanese' ? 'japanese_images' : 'images';
-        img.onclick = () => window.open(`/uploads/${imagePath}/${filename}`, '_blank');
+        img.onclick = () => window.open(imageUrl(filename), '_blank');
         imageContainer.appendChild(img);
     } else if (filename === "???") {
         imageContainer.innerHTML = '<strong>画像:</strong> ???';
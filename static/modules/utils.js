@@ -6,6 +6,15 @@ export function escapeHtml(text) {
     return div.innerHTML;
 }
 
+// 画像・サムネイルのURL (配信先はbodyのdata属性でサーバーから渡される)
+export function imageUrl(filename) {
+    return `${document.body.dataset.uploadUrl}/${filename}`;
+}
+
+export function thumbnailUrl(filename) {
+    return `${document.body.dataset.thumbUrl}/thumb_${filename}`;
+}
+
 // メッセージ表示機能 (モーダルに表示するように変更)
 export function openMessageModal(message, type = 'info') {
     const modal = document.getElementById('messageModal');